@@ -0,0 +1,90 @@
+"""Compare allocations per reading: legacy dict vs slotted ``Reading``.
+
+The plain ``dict``/``Reading`` rows are what sits in ``out_queue``; the
+``json``/``to_json`` rows add what the publisher pays per reading at the
+serialization edge, which is the end-to-end cost. The publisher uses
+``Reading.to_json``; compare it with ``dict + json.dumps``.
+
+Run from ``src``: ``python bench_readings.py [count]``
+"""
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List
+
+from utils.types import Reading, intern_id
+
+
+CAMERA = "0001000100082"
+NODE = "node1"
+URL = "http://192.168.1.171/cgi-bin/param.cgi?action=get&type=areaTemperature&cameraID=1&areaID=1"
+
+
+def make_dict() -> dict:
+    return {
+        "camera": CAMERA,
+        "type": "temperature",
+        "node_thermal": NODE,
+        "url": URL,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "data_t": "36.5",
+    }
+
+
+def make_reading() -> Reading:
+    return Reading(CAMERA, NODE, URL, time.time_ns(), "36.5")
+
+
+def make_dict_json() -> str:
+    return json.dumps(make_dict(), ensure_ascii=False)
+
+
+def make_reading_dict() -> dict:
+    return make_reading().to_dict()
+
+
+def make_reading_json() -> str:
+    return json.dumps(make_reading().to_dict(), ensure_ascii=False)
+
+
+def make_reading_to_json() -> str:
+    return make_reading().to_json()
+
+
+def measure(label: str, factory: Callable[[], object], count: int) -> None:
+    # Time without tracemalloc, which slows allocation-heavy code unevenly
+    start = time.perf_counter()
+    for _ in range(count):
+        factory()
+    elapsed = time.perf_counter() - start
+
+    keep: List[object] = []
+    tracemalloc.start()
+    for _ in range(count):
+        keep.append(factory())
+    current, _peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    print(f"{label:<24} {current / count:8.1f} B/reading "
+          f"{blocks / count:6.2f} blocks/reading "
+          f"{count / elapsed:12,.0f} readings/s")
+    del keep
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    global CAMERA, NODE, URL
+    CAMERA, NODE, URL = intern_id(CAMERA), intern_id(NODE), intern_id(URL)
+    measure("dict", make_dict, count)
+    measure("dict + json.dumps", make_dict_json, count)
+    measure("Reading", make_reading, count)
+    measure("Reading + to_dict", make_reading_dict, count)
+    measure("Reading + to_dict + json", make_reading_json, count)
+    measure("Reading + to_json", make_reading_to_json, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 import threading
 import queue
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from config_loader import load_config
 from utils.logging import get_logger
+from utils.scheduler import FixedRateScheduler
+from utils.seq import SeqCounters
+from utils.types import Reading
 from workers.read_thermal_poller import poller_worker
 from workers.mqtt_publisher import mqtt_publisher_worker
 from workers.mqtt_subscriber import mqtt_subscriber_worker
 from workers.rtsp_fetcher import rtsp_fetcher_worker
+from workers.ha_coordinator import ha_coordinator_worker
 from nicegui import ui, app
 from ui_app import register_pages    # 👈 import UI từ file riêng
 
@@ -14,22 +18,44 @@ log = get_logger("main")
 
 
 def start_workers(stop_event: threading.Event) -> Tuple[
-    List[threading.Thread], threading.Thread, Optional[threading.Thread], List[threading.Thread], "queue.Queue[dict]"
+    List[threading.Thread], threading.Thread, Optional[threading.Thread], List[threading.Thread],
+    List[threading.Thread], "queue.Queue[Union[Reading, dict]]"
 ]:
     """Khởi động các worker (poller, MQTT, RTSP fetcher)."""
     config = load_config()
-    out_queue: "queue.Queue[dict]" = queue.Queue(maxsize=100)
+    out_queue: "queue.Queue[Union[Reading, dict]]" = queue.Queue(maxsize=100)
     cmd_queue: "queue.Queue[str]" = queue.Queue(maxsize=50)
+    mqtt_cfg = config.get("mqtt", {}) or {}
+    seq_counters = SeqCounters()
+
+    # --- HA: only the elected leader polls cameras ---
+    active_event: Optional[threading.Event] = None
+    # Scheduler and HA coordinator: not per-camera, joined on their own
+    service_threads: List[threading.Thread] = []
+    if mqtt_cfg.get("enabled", False) and (mqtt_cfg.get("ha") or {}).get("enabled", False):
+        active_event = threading.Event()
+        t = threading.Thread(
+            target=ha_coordinator_worker,
+            args=(mqtt_cfg, stop_event, active_event, seq_counters),
+            daemon=True,
+            name="ha-coordinator",
+        )
+        t.start()
+        service_threads.append(t)
 
-    # --- Start poller threads ---
+    # --- Start poller threads (paced by one fixed-rate scheduler) ---
+    scheduler = FixedRateScheduler(active_event)
+    measure_queues: "Dict[str, queue.Queue[dict]]" = {}
     camera_threads: List[threading.Thread] = []
     for idx, p in enumerate(config.get("cameras", []), start=1):
         name = str(p.get("name") or f"camera_{idx}")
+        interval_seconds = int(p.get("interval_seconds", 30))
+        measure_queues[name] = queue.Queue(maxsize=10)
         t = threading.Thread(
             target=poller_worker,
             args=(
                 name,
-                int(p.get("interval_seconds", 30)),
+                interval_seconds,
                 out_queue,
                 stop_event,
                 p.get("node_thermals"),
@@ -37,6 +63,9 @@ def start_workers(stop_event: threading.Event) -> Tuple[
                 p.get("password"),
                 float(p.get("timeout_seconds", 10.0)),
                 float(p.get("settle_seconds", 2.0)),
+                scheduler.add(name, interval_seconds, measure_queues[name]),
+                measure_queues[name],
+                seq_counters,
             ),
             daemon=True,
             name=f"camera:{name}",
@@ -44,8 +73,16 @@ def start_workers(stop_event: threading.Event) -> Tuple[
         t.start()
         camera_threads.append(t)
 
+    scheduler_thread = threading.Thread(
+        target=scheduler.run,
+        args=(stop_event,),
+        daemon=True,
+        name="scheduler",
+    )
+    scheduler_thread.start()
+    service_threads.append(scheduler_thread)
+
     # --- Start MQTT publisher ---
-    mqtt_cfg = config.get("mqtt", {}) or {}
     mqtt_thread = threading.Thread(
         target=mqtt_publisher_worker,
         args=(mqtt_cfg, out_queue, stop_event),
@@ -61,7 +98,7 @@ def start_workers(stop_event: threading.Event) -> Tuple[
     if mqtt_cfg.get("enabled", False):
         mqtt_sub_thread = threading.Thread(
             target=mqtt_subscriber_worker,
-            args=(mqtt_cfg, stop_event, cmd_queue, camera_names),
+            args=(mqtt_cfg, stop_event, cmd_queue, camera_names, measure_queues),
             daemon=True,
             name="mqtt-subscriber",
         )
@@ -75,7 +112,8 @@ def start_workers(stop_event: threading.Event) -> Tuple[
             t = threading.Thread(
                 target=rtsp_fetcher_worker,
                 args=(endpoint, out_queue, cmd_queue, stop_event,
-                      p.get("username"), p.get("password"), p.get("name")),
+                      p.get("username"), p.get("password"), p.get("name"),
+                      0.5, active_event),
                 daemon=True,
                 name=f"rtsp-fetcher:{p.get('name') or 'unknown'}",
             )
@@ -83,8 +121,8 @@ def start_workers(stop_event: threading.Event) -> Tuple[
             rtsp_threads.append(t)
 
     log.info("Started %d poller(s), mqtt=%s", len(
-        camera_threads), mqtt_cfg.get("enabled", False))
-    return camera_threads, mqtt_thread, mqtt_sub_thread, rtsp_threads, out_queue
+        scheduler.jobs()), mqtt_cfg.get("enabled", False))
+    return camera_threads, mqtt_thread, mqtt_sub_thread, rtsp_threads, service_threads, out_queue
 
 
 def stop_workers(
@@ -92,7 +130,8 @@ def stop_workers(
     mqtt_thread: Optional[threading.Thread],
     mqtt_sub_thread: Optional[threading.Thread],
     rtsp_threads: List[threading.Thread],
-    out_queue: "queue.Queue[dict]",
+    service_threads: List[threading.Thread],
+    out_queue: "queue.Queue[Union[Reading, dict]]",
     stop_event: threading.Event,
 ) -> None:
     """Dừng toàn bộ worker."""
@@ -111,6 +150,9 @@ def stop_workers(
         mqtt_sub_thread.join(timeout=5)
     for t in rtsp_threads:
         t.join(timeout=5)
+    # Last, so the HA lease is only released once the pollers have stopped
+    for t in service_threads:
+        t.join(timeout=5)
     log.info("Stopped workers.")
 
 
@@ -129,7 +171,7 @@ def build_ui():
 def main():
     stop_event = threading.Event()
     # workers = start_workers(stop_event)
-    camera_threads, mqtt_thread, mqtt_sub_thread, rtsp_threads, out_queue = start_workers(
+    camera_threads, mqtt_thread, mqtt_sub_thread, rtsp_threads, service_threads, out_queue = start_workers(
         stop_event)
 
     # UI
@@ -141,7 +183,7 @@ def main():
     def _cleanup():
         # stop_workers(*workers, stop_event)
         stop_workers(camera_threads, mqtt_thread, mqtt_sub_thread,
-                     rtsp_threads, out_queue, stop_event)
+                     rtsp_threads, service_threads, out_queue, stop_event)
 
     # Run app
     ui.run(port=8080, reload=False, storage_secret='super-secret-key')
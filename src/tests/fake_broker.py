@@ -0,0 +1,79 @@
+"""In-process MQTT broker stand-in with the paho client surface HA uses.
+
+Delivery is synchronous. Retained messages are replayed on subscribe, and
+``die()`` publishes the client's last-will. ``partitioned`` cuts a client off
+in both directions without a will, like a broken link the broker has not
+noticed yet.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class Message:
+    def __init__(self, topic: str, payload: str) -> None:
+        self.topic = topic
+        self.payload = payload.encode("utf-8")
+
+
+class FakeBroker:
+    def __init__(self) -> None:
+        self.retained: Dict[str, str] = {}
+        self.clients: List["FakeClient"] = []
+
+    def publish(self, sender: Optional["FakeClient"], topic: str,
+                payload: str, retain: bool) -> None:
+        if sender is not None and sender.partitioned:
+            return
+        if retain:
+            self.retained[topic] = payload
+        for client in list(self.clients):
+            if topic in client.subscriptions and not client.partitioned:
+                client.on_message(client, None, Message(topic, payload))
+
+
+class FakeClient:
+    def __init__(self, broker: FakeBroker, client_id: str = "") -> None:
+        self.broker = broker
+        self.client_id = client_id
+        self.subscriptions: Set[str] = set()
+        self.will: Optional[Tuple[str, str, bool]] = None
+        self.partitioned = False
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+
+    def will_set(self, topic: str, payload: str, qos: int = 0,
+                 retain: bool = False) -> None:
+        self.will = (topic, payload, retain)
+
+    def username_pw_set(self, username: str, password: str) -> None:
+        pass
+
+    def connect(self, host: str = "", port: int = 0, keepalive: int = 60) -> None:
+        self.broker.clients.append(self)
+        self.on_connect(self, None, {}, 0)
+
+    def loop_start(self) -> None:
+        pass
+
+    def loop_stop(self) -> None:
+        pass
+
+    def subscribe(self, topic: str, qos: int = 0) -> None:
+        self.subscriptions.add(topic)
+        if topic in self.broker.retained:
+            self.on_message(self, None, Message(topic, self.broker.retained[topic]))
+
+    def publish(self, topic: str, payload: str, qos: int = 0,
+                retain: bool = False) -> None:
+        self.broker.publish(self, topic, payload, retain)
+
+    def disconnect(self) -> None:
+        if self in self.broker.clients:
+            self.broker.clients.remove(self)
+
+    def die(self) -> None:
+        """Drop the connection uncleanly; the broker sends the last-will."""
+        self.disconnect()
+        if self.will is not None:
+            topic, payload, retain = self.will
+            self.broker.publish(None, topic, payload, retain)
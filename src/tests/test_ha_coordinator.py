@@ -0,0 +1,122 @@
+import json
+import threading
+
+import pytest
+
+from fake_broker import FakeBroker, FakeClient
+from utils.seq import SeqCounters
+from workers.ha_coordinator import LeaseElection
+
+
+LEASE = 5.0
+RENEW = 1.0
+TEMPERATURE_TOPIC = "camera/temperature"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Gateway:
+    def __init__(self, broker: FakeBroker, node_id: str, clock: Clock) -> None:
+        self.client = FakeClient(broker, f"ha-{node_id}")
+        self.active = threading.Event()
+        self.seq = SeqCounters()
+        self.election = LeaseElection(
+            self.client, node_id, "camera/ha", self.active, self.seq,
+            temperature_topic=TEMPERATURE_TOPIC,
+            lease_seconds=LEASE, renew_seconds=RENEW, clock=clock,
+        )
+        self.client.connect()
+
+
+def advance(clock: Clock, seconds: float, *gateways: Gateway) -> None:
+    """Move time forward in quarter-renew steps, ticking every gateway."""
+    end = clock.now + seconds
+    while clock.now < end:
+        clock.now = min(clock.now + RENEW / 4, end)
+        for gw in gateways:
+            gw.election.tick()
+
+
+@pytest.fixture
+def pair():
+    broker = FakeBroker()
+    clock = Clock()
+    a = Gateway(broker, "gw-a", clock)
+    b = Gateway(broker, "gw-b", clock)
+    return broker, clock, a, b
+
+
+def test_single_leader_after_startup(pair):
+    _broker, clock, a, b = pair
+    advance(clock, LEASE / 2, a, b)
+    assert not a.active.is_set() and not b.active.is_set()
+
+    advance(clock, LEASE, a, b)
+    assert a.active.is_set() != b.active.is_set()
+
+    advance(clock, 10 * LEASE, a, b)
+    assert a.active.is_set() != b.active.is_set()
+
+
+def test_standby_takes_over_on_last_will_and_continues_seq(pair):
+    broker, clock, a, b = pair
+    advance(clock, 2 * LEASE, a, b)
+    leader, standby = (a, b) if a.active.is_set() else (b, a)
+
+    for _ in range(3):
+        leader.seq.next("cam", "node1")
+    advance(clock, RENEW, a, b)
+    # A reading published after the last seq snapshot
+    seq = leader.seq.next("cam", "node1")
+    broker.publish(None, TEMPERATURE_TOPIC, json.dumps({
+        "type": "temperature", "camera": "cam", "node_thermal": "node1",
+        "seq": seq}), retain=False)
+
+    leader.client.die()
+    standby.election.tick()
+    assert standby.active.is_set()
+    assert standby.seq.next("cam", "node1") == 5
+
+
+def test_cut_off_leader_yields_before_standby_claims(pair):
+    _broker, clock, a, b = pair
+    advance(clock, 2 * LEASE, a, b)
+    leader, standby = (a, b) if a.active.is_set() else (b, a)
+
+    leader.client.partitioned = True
+    yielded_at = claimed_at = None
+    start = clock.now
+    while clock.now - start < 2 * LEASE:
+        advance(clock, RENEW / 4, leader, standby)
+        if yielded_at is None and not leader.active.is_set():
+            yielded_at = clock.now
+        if claimed_at is None and standby.active.is_set():
+            claimed_at = clock.now
+
+    assert yielded_at is not None and claimed_at is not None
+    assert yielded_at < claimed_at
+    assert not leader.active.is_set()
+
+
+def test_clean_release_hands_over_immediately(pair):
+    _broker, clock, a, b = pair
+    advance(clock, 2 * LEASE, a, b)
+    leader, standby = (a, b) if a.active.is_set() else (b, a)
+
+    leader.election.release()
+    standby.election.tick()
+    assert standby.active.is_set()
+    assert not leader.active.is_set()
+
+
+def test_rejects_lease_shorter_than_three_renewals():
+    with pytest.raises(ValueError):
+        LeaseElection(FakeClient(FakeBroker()), "gw", "camera/ha",
+                      threading.Event(), SeqCounters(),
+                      lease_seconds=2.0, renew_seconds=1.0)
@@ -1,4 +1,5 @@
 from nicegui import ui, app
+from utils.types import Reading
 
 
 USERNAME = "admin"
@@ -33,8 +34,8 @@ def show_main_ui(out_queue):
     def update_ui():
         try:
             data = out_queue.get_nowait()
-            if data.get('type') == 'temperature':
-                text = f'{data["node_thermal"]}: {data["data_t"]} °C at {data["timestamp"]}'
+            if isinstance(data, Reading):
+                text = f'{data.node_thermal}: {data.data_t} °C at {data.timestamp}'
                 temp_label.text = text
         except Exception:
             pass
@@ -1,14 +1,244 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+
+# Records are handed to a background thread through this queue; the caller
+# only pays for a rate-limit check and a put_nowait().
+LOG_QUEUE_SIZE = 10000
+# Per (logger, message template) budget before sampling kicks in
+RATE_LIMIT_BURST = 20
+RATE_LIMIT_PERIOD_SECONDS = 10.0
+# Fraction of over-budget records that still get through (0 disables)
+RATE_LIMIT_SAMPLE = 0.01
+# How often the writer thread reports records lost to the limiter/full queue
+LOSS_REPORT_SECONDS = 60.0
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["_DroppingQueueHandler"] = None
+_rate_limit_filter: Optional["RateLimitFilter"] = None
+_setup_lock = threading.Lock()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit repetitive records per (logger, message template).
+
+    Each key gets ``burst`` records per ``period_seconds``; beyond that only a
+    ``sample`` fraction passes, carrying the number of records suppressed
+    since the last one emitted. WARNING and above are never dropped.
+    """
+
+    def __init__(
+        self,
+        burst: int = RATE_LIMIT_BURST,
+        period_seconds: float = RATE_LIMIT_PERIOD_SECONDS,
+        sample: float = RATE_LIMIT_SAMPLE,
+    ) -> None:
+        super().__init__()
+        self.burst = burst
+        self.period_seconds = period_seconds
+        self.sample = sample
+        # key -> [window_start, count_in_window, suppressed_since_last_emit]
+        self._windows: Dict[Tuple[str, object], List[float]] = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period_seconds:
+                suppressed = int(window[2]) if window else 0
+                self._windows[key] = [now, 1, 0]
+            else:
+                window[1] += 1
+                if window[1] > self.burst and not (
+                    self.sample > 0 and random.random() < self.sample
+                ):
+                    window[2] += 1
+                    self.suppressed_total += 1
+                    return False
+                suppressed = int(window[2])
+                window[2] = 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, keep the traceback in exc_text instead
+        # of folding it into msg, so the JSON line gets a separate "exc" key.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(
+                record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _ReportingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that periodically logs how many records were lost.
+
+    Records dropped on a full queue and records suppressed by the rate limiter
+    are otherwise invisible; every ``report_seconds`` the writer thread emits
+    one WARNING with the counts since the previous report (if any).
+    """
+
+    def __init__(self, log_queue, *handlers, report_seconds: float = LOSS_REPORT_SECONDS,
+                 **kwargs) -> None:
+        super().__init__(log_queue, *handlers, **kwargs)
+        self.report_seconds = report_seconds
+        self._next_report = time.monotonic() + report_seconds
+        self._reported_dropped = 0
+        self._reported_suppressed = 0
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            now = time.monotonic()
+            if now >= self._next_report:
+                self._next_report = now + self.report_seconds
+                self._report_losses()
+            try:
+                return self.queue.get(
+                    block, timeout=max(self._next_report - now, 0.01))
+            except queue.Empty:
+                if not block:
+                    raise
+
+    def _report_losses(self) -> None:
+        dropped = dropped_records()
+        suppressed = suppressed_records()
+        new_dropped = dropped - self._reported_dropped
+        new_suppressed = suppressed - self._reported_suppressed
+        self._reported_dropped, self._reported_suppressed = dropped, suppressed
+        if not new_dropped and not new_suppressed:
+            return
+        record = logging.getLogger("utils.logging").makeRecord(
+            "utils.logging", logging.WARNING, __file__, 0,
+            "Logging lost %d record(s) to a full queue and rate-limited %d "
+            "in the last %.0fs",
+            (new_dropped, new_suppressed, self.report_seconds), None)
+        self.handle(record)
+
+
+def _parse_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
 
 
 def setup_logging(default_level: int = logging.INFO) -> None:
-    if logging.getLogger().handlers:
-        return
-    logging.basicConfig(
-        level=default_level,
-        format="%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s",
-    )
+    global _listener, _queue_handler, _rate_limit_filter
+    with _setup_lock:
+        if logging.getLogger().handlers:
+            return
+
+        level = default_level
+        if os.environ.get("LOG_LEVEL"):
+            level = _parse_level(os.environ["LOG_LEVEL"])
+
+        log_file = os.environ.get("LOG_FILE")
+        if log_file:
+            sink: logging.Handler = logging.FileHandler(log_file, encoding="utf-8")
+        else:
+            sink = logging.StreamHandler()
+        sink.setFormatter(JsonLineFormatter())
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(
+            maxsize=LOG_QUEUE_SIZE)
+        _queue_handler = _DroppingQueueHandler(log_queue)
+        _rate_limit_filter = RateLimitFilter()
+        _queue_handler.addFilter(_rate_limit_filter)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+
+        _listener = _ReportingQueueListener(
+            log_queue, sink, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        try:
+            _listener.stop()
+        finally:
+            _listener = None
+
+
+def set_log_level(level: Union[int, str], logger_name: Optional[str] = None) -> int:
+    """Change the level of the root logger (or ``logger_name``) at runtime."""
+    value = _parse_level(level)
+    logging.getLogger(logger_name or None).setLevel(value)
+    return value
+
+
+def dropped_records() -> int:
+    """Records dropped so far because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def suppressed_records() -> int:
+    """Records suppressed so far by the rate limiter."""
+    return _rate_limit_filter.suppressed_total if _rate_limit_filter else 0
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -16,6 +246,13 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
-__all__ = ["get_logger", "setup_logging"]
-
-
+__all__ = [
+    "get_logger",
+    "setup_logging",
+    "shutdown_logging",
+    "set_log_level",
+    "dropped_records",
+    "suppressed_records",
+    "JsonLineFormatter",
+    "RateLimitFilter",
+]
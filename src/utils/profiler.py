@@ -0,0 +1,166 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from utils.logging import get_logger
+
+
+log = get_logger("utils.profiler")
+
+
+DEFAULT_PROFILE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "profiles")
+DEFAULT_RATE_HZ = 100.0
+MAX_STACK_DEPTH = 64
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler over every thread in the process.
+
+    Nothing runs while it is stopped. When started, one daemon thread reads
+    ``sys._current_frames()`` at ``rate_hz`` and counts collapsed stacks
+    (``thread;module:function;...``), which ``stop`` writes as a ``.folded``
+    file for flamegraph.pl, speedscope or inferno.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR) -> None:
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._rate_hz = DEFAULT_RATE_HZ
+        self._started_at = 0.0
+        self._last_output: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        rate_hz: float = DEFAULT_RATE_HZ,
+        duration_seconds: Optional[float] = None,
+    ) -> bool:
+        """Start sampling; False if already running.
+
+        Raises ValueError for a non-finite ``rate_hz`` or ``duration_seconds``.
+        """
+        rate_hz = float(rate_hz)
+        if not math.isfinite(rate_hz):
+            raise ValueError(f"rate_hz must be finite, got {rate_hz}")
+        duration_seconds = float(duration_seconds) if duration_seconds else None
+        if duration_seconds is not None and not math.isfinite(duration_seconds):
+            raise ValueError(
+                f"duration_seconds must be finite, got {duration_seconds}")
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._rate_hz = min(max(rate_hz, 1.0), 1000.0)
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration_seconds,),
+                daemon=True,
+                name="profiler",
+            )
+            self._thread.start()
+        log.warning("Profiler started at %.0f Hz%s", self._rate_hz,
+                    f" for {duration_seconds}s" if duration_seconds else "")
+        return True
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the collapsed stacks; return the file path."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout=5)
+        with self._lock:
+            if self._thread is not thread:
+                # The duration timer and a manual stop raced; the other one writes
+                return self._last_output
+            self._thread = None
+            stacks, samples = self._stacks, self._samples
+        # Disk I/O outside the lock: stop() may run on the MQTT network thread
+        return self._write(stacks, samples)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "rate_hz": self._rate_hz,
+            "samples": self._samples,
+            "elapsed_seconds": round(time.monotonic() - self._started_at, 1)
+            if self.running else 0.0,
+            "last_output": self._last_output,
+        }
+
+    def _run(self, duration_seconds: Optional[float]) -> None:
+        interval = 1.0 / self._rate_hz
+        own_ident = threading.get_ident()
+        deadline = (time.monotonic() + duration_seconds
+                    if duration_seconds else None)
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            self._sample(own_ident)
+            next_sample += interval
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if next_sample < now:
+                # Sampling fell behind; do not try to catch up in a burst
+                next_sample = now
+            self._stop.wait(next_sample - now)
+
+        if deadline is not None and not self._stop.is_set():
+            self.stop()
+
+    def _sample(self, own_ident: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            parts = []
+            depth = 0
+            while frame is not None and depth < MAX_STACK_DEPTH:
+                code = frame.f_code
+                module = frame.f_globals.get("__name__", "?")
+                parts.append(f"{module}:{code.co_name}")
+                frame = frame.f_back
+                depth += 1
+            parts.append(names.get(ident, str(ident)).replace(";", ":"))
+            parts.reverse()
+            self._stacks[";".join(parts)] += 1
+        self._samples += 1
+
+    def _write(self, stacks: Counter, samples: int) -> Optional[str]:
+        if not stacks:
+            log.warning("Profiler stopped with no samples")
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir,
+            f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self._last_output = path
+        log.warning("Profiler wrote %d samples to %s", samples, path)
+        return path
+
+
+profiler = SamplingProfiler()
+
+
+__all__ = ["SamplingProfiler", "profiler", "DEFAULT_PROFILE_DIR"]
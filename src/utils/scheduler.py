@@ -0,0 +1,244 @@
+import heapq
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.logging import get_logger
+
+
+log = get_logger("utils.scheduler")
+
+
+# Posted to a job's inbox when it is released, so a poller that also waits
+# for other work (measure requests) blocks on one queue for both.
+SCHEDULE_TICK: Dict[str, str] = {"type": "schedule_tick"}
+
+# Outcomes of ScheduledJob._release()
+RELEASED = "released"
+# Still running: the tick is kept and runs as soon as the cycle ends
+DEFERRED = "deferred"
+# Still running with a deferred tick already pending: the period is skipped
+SKIPPED = "skipped"
+# The previous tick was never picked up (poller stopped or wedged)
+UNCLAIMED = "unclaimed"
+# Log an unclaimed streak on the first miss and then every this many
+UNCLAIMED_LOG_EVERY = 100
+
+
+class ScheduledJob:
+    """Per-camera handle: the scheduler releases it, the poller waits on it."""
+
+    def __init__(
+        self,
+        name: str,
+        interval_seconds: float,
+        active: Optional[threading.Event] = None,
+        inbox: "Optional[queue.Queue[dict]]" = None,
+    ) -> None:
+        self.name = name
+        self.interval_seconds = float(interval_seconds)
+        self.phase_seconds = 0.0
+        self.runs = 0
+        self.missed = 0
+        self.deferred = 0
+        self.unclaimed = 0
+        self.unclaimed_streak = 0
+        self.last_lateness = 0.0
+        self.last_duration = 0.0
+        # _ready and _busy change together under _cond, so a tick can never
+        # slip in between the poller taking one and marking itself busy
+        self._cond = threading.Condition()
+        self._ready = False
+        self._busy = False
+        self._deadline = 0.0
+        self._late_deadline: Optional[float] = None
+        self._started_at = 0.0
+        self._active = active
+        self.inbox = inbox
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    @property
+    def active(self) -> bool:
+        """False while this gateway is an HA standby."""
+        return self._active is None or self._active.is_set()
+
+    def wait(self, stop_event: threading.Event, poll_seconds: float = 0.5) -> bool:
+        """Block until the next tick; return False once stop_event is set."""
+        with self._cond:
+            while not stop_event.is_set():
+                if self._acquire_locked():
+                    return True
+                self._cond.wait(poll_seconds)
+        return False
+
+    def try_acquire(self) -> bool:
+        """Start a cycle if a tick is pending, without blocking."""
+        with self._cond:
+            return self._acquire_locked()
+
+    def _acquire_locked(self) -> bool:
+        if not self._ready:
+            return False
+        self._ready = False
+        self._busy = True
+        self.unclaimed_streak = 0
+        self._started_at = time.monotonic()
+        self.last_lateness = self._started_at - self._deadline
+        return True
+
+    def done(self) -> None:
+        with self._cond:
+            self.last_duration = time.monotonic() - self._started_at
+            self.runs += 1
+            self._busy = False
+            # A tick that arrived mid-cycle runs now instead of a period later
+            late_deadline, self._late_deadline = self._late_deadline, None
+            if late_deadline is not None:
+                self._set_ready_locked(late_deadline)
+        if late_deadline is not None:
+            self._post_tick()
+
+    def _release(self, deadline: float) -> str:
+        with self._cond:
+            if self._ready:
+                return UNCLAIMED
+            if self._busy:
+                if self._late_deadline is not None:
+                    return SKIPPED
+                self._late_deadline = deadline
+                return DEFERRED
+            self._set_ready_locked(deadline)
+        self._post_tick()
+        return RELEASED
+
+    def _set_ready_locked(self, deadline: float) -> None:
+        self._deadline = deadline
+        self._ready = True
+        self._cond.notify()
+
+    def _post_tick(self) -> None:
+        if self.inbox is not None:
+            try:
+                self.inbox.put_nowait(SCHEDULE_TICK)
+            except queue.Full:
+                # The poller drains the inbox and checks try_acquire() after
+                # every item, so it still sees this tick
+                pass
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "phase_seconds": self.phase_seconds,
+            "runs": self.runs,
+            "missed": self.missed,
+            "deferred": self.deferred,
+            "unclaimed": self.unclaimed,
+            "last_lateness": self.last_lateness,
+            "last_duration": self.last_duration,
+        }
+
+
+class FixedRateScheduler:
+    """Release every job at a fixed rate from one monotonic-clock heap.
+
+    Deadlines advance by ``interval`` from the previous deadline rather than
+    from the end of the work, so the period does not drift. Jobs are phased
+    evenly across their interval at start to avoid bursts. A tick that finds
+    its job still running is deferred until the cycle ends (at most one);
+    further ticks in that cycle are counted as missed. While ``active``
+    is given and clear (HA standby) ticks pass without releasing any job.
+    """
+
+    def __init__(self, active: Optional[threading.Event] = None) -> None:
+        self._active = active
+        self._jobs: List[ScheduledJob] = []
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._started = False
+
+    def add(
+        self,
+        name: str,
+        interval_seconds: float,
+        inbox: "Optional[queue.Queue[dict]]" = None,
+    ) -> ScheduledJob:
+        job = ScheduledJob(
+            name, max(float(interval_seconds), 0.001), self._active, inbox)
+        with self._lock:
+            self._jobs.append(job)
+            if self._started:
+                heapq.heappush(self._heap, (time.monotonic(), id(job), job))
+                self._wakeup.set()
+        return job
+
+    def jobs(self) -> List[ScheduledJob]:
+        with self._lock:
+            return list(self._jobs)
+
+    def _spread_phases(self, now: float) -> None:
+        count = len(self._jobs)
+        for idx, job in enumerate(self._jobs):
+            job.phase_seconds = job.interval_seconds * idx / count
+            heapq.heappush(
+                self._heap, (now + job.phase_seconds, id(job), job))
+
+    def run(self, stop_event: threading.Event) -> None:
+        with self._lock:
+            self._spread_phases(time.monotonic())
+            self._started = True
+        log.info("Scheduler started with %d job(s)", len(self._jobs))
+
+        while not stop_event.is_set():
+            with self._lock:
+                next_deadline: Optional[float] = self._heap[0][0] if self._heap else None
+            timeout = 0.5 if next_deadline is None else max(
+                0.0, min(next_deadline - time.monotonic(), 0.5))
+            if timeout > 0:
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            with self._lock:
+                deadline, key, job = heapq.heappop(self._heap)
+                if job.active:
+                    self._account(job, job._release(deadline))
+                next_deadline = deadline + job.interval_seconds
+                if next_deadline <= now:
+                    # Fell behind by whole periods: skip them, keep the phase
+                    skipped = int((now - next_deadline) // job.interval_seconds) + 1
+                    job.missed += skipped
+                    next_deadline += skipped * job.interval_seconds
+                heapq.heappush(self._heap, (next_deadline, key, job))
+
+        log.info("Scheduler stopped.")
+
+    @staticmethod
+    def _account(job: ScheduledJob, outcome: str) -> None:
+        if outcome == DEFERRED:
+            job.deferred += 1
+            log.info("[%s] Cycle overran its period; next one starts when it ends",
+                     job.name)
+        elif outcome == SKIPPED:
+            job.missed += 1
+            log.info("[%s] Skipped a period (still running, %d missed)",
+                     job.name, job.missed)
+        elif outcome == UNCLAIMED:
+            job.unclaimed += 1
+            job.unclaimed_streak += 1
+            if (job.unclaimed_streak == 1
+                    or job.unclaimed_streak % UNCLAIMED_LOG_EVERY == 0):
+                log.warning("[%s] Poller has not picked up its tick "
+                            "(%d in a row); is it still running?",
+                            job.name, job.unclaimed_streak)
+            else:
+                log.debug("[%s] Tick still unclaimed (%d in a row)",
+                          job.name, job.unclaimed_streak)
+
+
+__all__ = ["FixedRateScheduler", "ScheduledJob", "SCHEDULE_TICK"]
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict
+
+
+class SeqCounters:
+    """Per-node message sequence numbers (``seq`` in the temperature message).
+
+    Keys are ``"<camera>/<node>"``. ``merge`` only ever moves counters
+    forward, so state learned from a previous leader can be applied safely.
+    """
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+
+    @staticmethod
+    def key(camera: str, node: str) -> str:
+        return f"{camera}/{node}"
+
+    def next(self, camera: str, node: str) -> int:
+        key = self.key(camera, node)
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            self._version += 1
+            return value
+
+    def observe(self, camera: str, node: str, seq: int) -> None:
+        self.merge({self.key(camera, node): seq})
+
+    def merge(self, counters: Dict[str, int]) -> None:
+        with self._lock:
+            for key, value in counters.items():
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    continue
+                if value > self._counters.get(key, 0):
+                    self._counters[key] = value
+                    self._version += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+
+__all__ = ["SeqCounters"]
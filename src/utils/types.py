@@ -1,4 +1,7 @@
-from typing import TypedDict, Optional, List, Dict, Any
+import sys
+from datetime import datetime
+from json.encoder import encode_basestring
+from typing import TypedDict, Optional, List, Dict, Any, Tuple
 
 
 class CameraConfig(TypedDict, total=False):
@@ -22,13 +25,23 @@ class PollerConfig(TypedDict, total=False):
     settle_seconds: float
 
 
+class HAConfig(TypedDict, total=False):
+    enabled: bool
+    node_id: str
+    topic: str
+    lease_seconds: float
+    renew_seconds: float
+
+
 class MQTTConfig(TypedDict, total=False):
     enabled: bool
     host: str
     port: int
     topic: str
+    topic_temperature: str
     username: str
     password: str
+    ha: HAConfig
 
 
 class AppConfig(TypedDict, total=False):
@@ -36,20 +49,161 @@ class AppConfig(TypedDict, total=False):
     mqtt: MQTTConfig
 
 
-class QueueItem(TypedDict):
-    poller: str
+class QueueItem(TypedDict, total=False):
+    """Wire form of a temperature reading (see ``Reading.to_dict``)."""
     camera: str
+    type: str
+    node_thermal: str
     url: str
     timestamp: str
-    data: str
+    data_t: str
+    seq: int
+    # Only on readings answering a "measure now" command
+    request_id: str
+    latency_ms: Optional[float]
+    queue_wait_ms: Optional[float]
+
+
+class RtspUrlItem(TypedDict):
+    sid: str
+    type: str
+    timestamp: str
+    rtsp_url: str
+    status: str
+
+
+# (epoch second, ISO string) of the last timestamp formatted; readings arrive
+# in bursts within the same second, so this saves most datetime formatting.
+_iso_second_cache: Tuple[int, str] = (-1, "")
+
+
+def _iso_seconds(timestamp_ns: int) -> str:
+    global _iso_second_cache
+    second = timestamp_ns // 1_000_000_000
+    cached = _iso_second_cache
+    if cached[0] == second:
+        return cached[1]
+    text = datetime.fromtimestamp(second).isoformat(timespec="seconds")
+    _iso_second_cache = (second, text)
+    return text
+
+
+def _json_str(value: Optional[str]) -> str:
+    return "null" if value is None else encode_basestring(value)
+
+
+def _json_num(value: Optional[float]) -> str:
+    return "null" if value is None else repr(value)
+
+
+class Reading:
+    """One temperature reading as it travels through ``out_queue``.
+
+    Identifiers are interned and the timestamp is kept as epoch nanoseconds;
+    it is only formatted when the reading is serialized with ``to_dict``.
+    """
+
+    __slots__ = (
+        "camera",
+        "node_thermal",
+        "url",
+        "timestamp_ns",
+        "data_t",
+        "request_id",
+        "latency_ms",
+        "queue_wait_ms",
+        "seq",
+    )
+
+    type = "temperature"
+
+    def __init__(
+        self,
+        camera: str,
+        node_thermal: str,
+        url: str,
+        timestamp_ns: int,
+        data_t: str,
+        request_id: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        queue_wait_ms: Optional[float] = None,
+        seq: Optional[int] = None,
+    ) -> None:
+        self.camera = camera
+        self.node_thermal = node_thermal
+        self.url = url
+        self.timestamp_ns = timestamp_ns
+        self.data_t = data_t
+        self.request_id = request_id
+        self.latency_ms = latency_ms
+        self.queue_wait_ms = queue_wait_ms
+        self.seq = seq
+
+    @property
+    def timestamp(self) -> str:
+        return _iso_seconds(self.timestamp_ns)
+
+    def to_dict(self) -> QueueItem:
+        item: QueueItem = {
+            "camera": self.camera,
+            "type": self.type,
+            "node_thermal": self.node_thermal,
+            "url": self.url,
+            "timestamp": self.timestamp,
+            "data_t": self.data_t,
+        }
+        if self.seq is not None:
+            item["seq"] = self.seq
+        if self.request_id is not None:
+            item["request_id"] = self.request_id
+            item["latency_ms"] = self.latency_ms
+            item["queue_wait_ms"] = self.queue_wait_ms
+        return item
+
+    def to_json(self) -> str:
+        """Serialize straight from the slots.
+
+        Same text as ``json.dumps(self.to_dict(), ensure_ascii=False)``
+        without building the intermediate dict.
+        """
+        parts = [
+            '{"camera": ', _json_str(self.camera),
+            ', "type": "temperature", "node_thermal": ', _json_str(self.node_thermal),
+            ', "url": ', _json_str(self.url),
+            ', "timestamp": "', _iso_seconds(self.timestamp_ns),
+            '", "data_t": ', _json_str(self.data_t),
+        ]
+        if self.seq is not None:
+            parts += (', "seq": ', str(self.seq))
+        if self.request_id is not None:
+            parts += (
+                ', "request_id": ', _json_str(self.request_id),
+                ', "latency_ms": ', _json_num(self.latency_ms),
+                ', "queue_wait_ms": ', _json_num(self.queue_wait_ms),
+            )
+        parts.append("}")
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return (f"Reading({self.camera!r}, {self.node_thermal!r}, "
+                f"{self.data_t!r} at {self.timestamp})")
+
+
+def intern_id(value: Optional[str], default: str = "unknown") -> str:
+    """Intern an identifier repeated on every reading (camera, node, URL)."""
+    return sys.intern(str(value) if value else default)
 
 
 __all__ = [
     "CameraConfig",
     "PollerConfig",
+    "HAConfig",
     "MQTTConfig",
     "AppConfig",
     "QueueItem",
+    "RtspUrlItem",
+    "Reading",
+    "intern_id",
 ]
 
 
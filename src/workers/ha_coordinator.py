@@ -0,0 +1,298 @@
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.logging import get_logger
+from utils.seq import SeqCounters
+
+
+log = get_logger("workers.ha_coordinator")
+
+
+class LeaseElection:
+    """Active/standby election over a retained MQTT lease topic.
+
+    The leader republishes ``<topic>/lease`` (retained) every
+    ``renew_seconds`` and registers a last-will that marks the lease
+    released, so the broker announces an unexpected death. A standby takes
+    over once the lease is released or has not been renewed for
+    ``lease_seconds`` (measured on its own monotonic clock, so gateway clocks
+    need not agree). When two gateways claim at once the lower node id wins.
+
+    The leader watches the broker echo its own lease back and steps down once
+    that echo is older than ``lease_seconds - 2 * renew_seconds``. A leader
+    cut off from the broker therefore always yields before a standby, which
+    waits the full ``lease_seconds``, can claim. Likewise a claim only takes
+    effect once the broker echoes it, so a gateway that cannot reach the
+    broker never becomes leader.
+
+    The leader also keeps ``<topic>/seq`` (retained) up to date, and the
+    standby follows the published temperature messages, so per-node ``seq``
+    counters continue where the previous leader stopped.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        node_id: str,
+        base_topic: str,
+        active_event: threading.Event,
+        seq_counters: SeqCounters,
+        temperature_topic: Optional[str] = None,
+        lease_seconds: float = 5.0,
+        renew_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if lease_seconds < 3 * renew_seconds:
+            raise ValueError(
+                "HA lease_seconds must be at least 3 x renew_seconds "
+                f"(got {lease_seconds} and {renew_seconds})")
+        self.client = client
+        self.node_id = node_id
+        self.lease_topic = f"{base_topic}/lease"
+        self.seq_topic = f"{base_topic}/seq"
+        self.temperature_topic = temperature_topic
+        self.active_event = active_event
+        self.seq_counters = seq_counters
+        self.lease_seconds = float(lease_seconds)
+        self.renew_seconds = float(renew_seconds)
+        # Own echo older than this means the broker lost us
+        self.echo_timeout = self.lease_seconds - 2 * self.renew_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._connected_at: Optional[float] = None
+        self._own_seen = 0.0
+        # Set while our claim waits for the broker to echo it back
+        self._claimed_at: Optional[float] = None
+        self._other_owner: Optional[str] = None
+        self._other_seen = 0.0
+        self._last_renew = 0.0
+        self._published_seq_version = -1
+
+        client.will_set(self.lease_topic, self._lease_payload(released=True),
+                        qos=1, retain=True)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+
+    @property
+    def is_leader(self) -> bool:
+        return self.active_event.is_set()
+
+    def _lease_payload(self, released: bool = False) -> str:
+        return json.dumps({
+            "owner": self.node_id,
+            "released": released,
+            "lease_seconds": self.lease_seconds,
+            "ts": time.time(),
+        })
+
+    def _on_connect(self, client_obj, _userdata, _flags, rc) -> None:
+        if rc != 0:
+            log.error("HA MQTT connect returned code %s", rc)
+            return
+        topics = [self.lease_topic, self.seq_topic]
+        if self.temperature_topic:
+            topics.append(self.temperature_topic)
+        for topic in topics:
+            client_obj.subscribe(topic, qos=1)
+        with self._lock:
+            self._connected_at = self._clock()
+
+    def _on_disconnect(self, _client, _userdata, rc) -> None:
+        log.warning("HA MQTT disconnected (rc=%s)", rc)
+        with self._lock:
+            self._connected_at = None
+
+    def _on_message(self, _client, _userdata, msg) -> None:
+        try:
+            data = json.loads(msg.payload.decode("utf-8", errors="replace"))
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(data, dict):
+            return
+
+        if msg.topic == self.lease_topic:
+            self._on_lease(data)
+        elif self.is_leader:
+            # Our own echo; the leader's counters are authoritative
+            return
+        elif msg.topic == self.seq_topic:
+            self.seq_counters.merge(data)
+        elif data.get("type") == "temperature" and "seq" in data:
+            self.seq_counters.observe(
+                str(data.get("camera")), str(data.get("node_thermal")), data["seq"])
+
+    def _on_lease(self, data: Dict[str, Any]) -> None:
+        owner = str(data.get("owner") or "")
+        if not owner:
+            return
+        if owner == self.node_id:
+            if data.get("released"):
+                return
+            with self._lock:
+                self._own_seen = self._clock()
+                confirmed = self._claimed_at is not None
+                self._claimed_at = None
+            if confirmed:
+                # Only a claim the broker accepted makes us leader
+                log.warning("HA took over leadership")
+                self.active_event.set()
+            return
+        with self._lock:
+            if data.get("released"):
+                if owner == self._other_owner:
+                    self._other_owner = None
+                log.info("HA lease released by %s", owner)
+                return
+            self._other_owner = owner
+            self._other_seen = self._clock()
+            if self._claimed_at is not None and owner < self.node_id:
+                self._claimed_at = None
+        if self.is_leader and owner < self.node_id:
+            log.warning("HA lease contested by %s; stepping down", owner)
+            self.active_event.clear()
+
+    def tick(self) -> None:
+        """Advance the election; call every fraction of ``renew_seconds``."""
+        now = self._clock()
+        if self.is_leader:
+            with self._lock:
+                echo_age = now - self._own_seen
+            if echo_age > self.echo_timeout:
+                # Yield before any standby can see our lease as lapsed
+                log.warning("HA lease not echoed by the broker for %.1fs; "
+                            "stepping down", echo_age)
+                self.active_event.clear()
+            elif now - self._last_renew >= self.renew_seconds:
+                self._renew(now)
+            return
+
+        with self._lock:
+            if self._connected_at is None:
+                return
+            if self._claimed_at is not None:
+                if now - self._claimed_at <= self.echo_timeout:
+                    return
+                # Claim never echoed back; retry once the lease still looks lapsed
+                self._claimed_at = None
+            # Give a live leader's retained lease time to arrive after connect
+            if now - self._connected_at < self.lease_seconds:
+                return
+            lapsed = (self._other_owner is None
+                      or now - self._other_seen > self.lease_seconds)
+            previous = self._other_owner
+        if lapsed:
+            log.info("HA claiming leadership (previous leader: %s)",
+                     previous or "none")
+            with self._lock:
+                self._claimed_at = now
+            self._renew(now)
+
+    def _renew(self, now: float) -> None:
+        self._last_renew = now
+        try:
+            self.client.publish(self.lease_topic, self._lease_payload(),
+                                qos=1, retain=True)
+            if self.seq_counters.version != self._published_seq_version:
+                self._published_seq_version = self.seq_counters.version
+                self.client.publish(
+                    self.seq_topic, json.dumps(self.seq_counters.snapshot()),
+                    qos=1, retain=True)
+        except Exception as e:
+            log.error("HA lease publish error: %s", e)
+
+    def release(self) -> None:
+        """Hand the lease over on a clean shutdown."""
+        if not self.is_leader:
+            return
+        self.active_event.clear()
+        try:
+            self.client.publish(
+                self.seq_topic, json.dumps(self.seq_counters.snapshot()),
+                qos=1, retain=True)
+            self.client.publish(self.lease_topic,
+                                self._lease_payload(released=True),
+                                qos=1, retain=True)
+        except Exception as e:
+            log.error("HA lease release error: %s", e)
+
+
+def ha_coordinator_worker(
+    settings: Dict[str, Any],
+    stop_event: threading.Event,
+    active_event: threading.Event,
+    seq_counters: SeqCounters,
+    client_factory: Optional[Callable[[str], Any]] = None,
+) -> None:
+    ha_cfg = (settings or {}).get("ha") or {}
+    node_id = str(ha_cfg.get("node_id")
+                  or f"{socket.gethostname()}-{os.getpid()}")
+    base_topic = ha_cfg.get("topic") or (
+        f"{((settings or {}).get('topic') or 'camera').split('/')[0]}/ha")
+
+    if client_factory is None:
+        try:
+            import paho.mqtt.client as mqtt  # type: ignore
+        except Exception:
+            log.error("MQTT library not available; HA disabled, running as leader.")
+            active_event.set()
+            return
+
+        def client_factory(client_id: str) -> Any:
+            return mqtt.Client(client_id=client_id)
+
+    client = client_factory(f"ha-{node_id}")
+    username = (settings or {}).get("username") or None
+    password = (settings or {}).get("password") or None
+    if username and password:
+        client.username_pw_set(username, password)
+    host = (settings or {}).get("host", "localhost")
+    port = int((settings or {}).get("port", 1883))
+
+    try:
+        election = LeaseElection(
+            client,
+            node_id,
+            base_topic,
+            active_event,
+            seq_counters,
+            temperature_topic=(settings or {}).get("topic_temperature"),
+            lease_seconds=float(ha_cfg.get("lease_seconds", 5.0)),
+            renew_seconds=float(ha_cfg.get("renew_seconds", 1.0)),
+        )
+    except ValueError as e:
+        # Stay standby: never poll without a working election
+        log.error("HA misconfigured, staying standby: %s", e)
+        return
+    log.info("HA node %s on %s (lease %.1fs)", node_id,
+             election.lease_topic, election.lease_seconds)
+
+    # Keep retrying the first connect; paho reconnects by itself afterwards
+    while not stop_event.is_set():
+        try:
+            client.connect(host, port, keepalive=max(
+                int(election.lease_seconds), 2))
+            client.loop_start()
+            break
+        except Exception as e:
+            log.error("HA failed to connect to MQTT %s:%s: %s", host, port, e)
+            stop_event.wait(election.lease_seconds)
+
+    try:
+        while not stop_event.wait(min(election.renew_seconds / 4, 0.25)):
+            election.tick()
+    finally:
+        election.release()
+        try:
+            client.loop_stop()
+            client.disconnect()
+        except Exception:
+            pass
+
+
+__all__ = ["LeaseElection", "ha_coordinator_worker"]
@@ -1,9 +1,10 @@
 import threading
 import queue
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Union
 
 from utils.logging import get_logger
+from utils.types import Reading
 
 
 log = get_logger("workers.mqtt_publisher")
@@ -11,7 +12,7 @@ log = get_logger("workers.mqtt_publisher")
 
 def mqtt_publisher_worker(
     settings: Dict[str, Any],
-    in_queue: "queue.Queue[dict]",
+    in_queue: "queue.Queue[Union[Reading, dict]]",
     stop_event: threading.Event,
 ) -> None:
     def drain_to_stdout() -> None:
@@ -22,13 +23,15 @@ def mqtt_publisher_worker(
                 continue
             if item is None:
                 break
+            if isinstance(item, Reading):
+                item = item.to_dict()
             log.info(
                 "[%s] %s/%s -> %s\n%s",
                 item.get("timestamp"),
                 item.get("camera"),
                 item.get("node_thermal") or "unknown",
                 item.get("url"),
-                item.get("data"),
+                item.get("data_t"),
             )
 
     # If MQTT is disabled, just drain to stdout
@@ -71,8 +74,17 @@ def mqtt_publisher_worker(
                 continue
             if item is None:
                 break
+            # Readings are formatted only here, at the serialization edge
+            if isinstance(item, Reading):
+                log.debug("Publishing item: %s", item.type)
+                try:
+                    client.publish((settings or {}).get("topic_temperature"),
+                                   item.to_json(), qos=0, retain=False)
+                except Exception as e:
+                    log.error("MQTT publish error: %s", e)
+                continue
 
-            log.info("Publishing item: %s", item.get('type'))
+            log.debug("Publishing item: %s", item.get('type'))
 
             if item.get('type') == 'temperature':
                 topic = (settings or {}).get("topic_temperature")
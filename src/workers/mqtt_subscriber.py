@@ -1,18 +1,102 @@
 import threading
 import json
-from typing import Dict, Any, List
+import time
+import uuid
+from typing import Dict, Any, List, Optional
 
-from utils.logging import get_logger
+from utils.logging import get_logger, set_log_level
+from utils.profiler import profiler
+from utils.types import intern_id
 
 
 log = get_logger("workers.mqtt_subscriber")
 
 
+def handle_local_command(payload_text: str) -> bool:
+    """Apply process-wide /cmd actions in place; return True if handled.
+
+    Supported:
+    - ``{"action": "log_level", "level": "DEBUG", "logger": "..."}``
+      (``logger`` is optional and defaults to the root logger)
+    - ``{"action": "profile", "state": "start", "rate_hz": 100,
+      "duration_seconds": 60}`` / ``{"action": "profile", "state": "stop"}``
+    """
+    try:
+        cmd = json.loads(payload_text)
+    except (json.JSONDecodeError, TypeError):
+        return False
+    if not isinstance(cmd, dict):
+        return False
+
+    action = cmd.get("action")
+    if action == "log_level":
+        try:
+            set_log_level(cmd.get("level", "INFO"), cmd.get("logger"))
+            log.warning("Log level of %s set to %s",
+                        cmd.get("logger") or "root", cmd.get("level", "INFO"))
+        except ValueError as e:
+            log.error("Invalid log_level command: %s", e)
+        return True
+    if action == "profile":
+        try:
+            if cmd.get("state", "start") == "stop":
+                profiler.stop()
+            else:
+                profiler.start(
+                    float(cmd.get("rate_hz", 100)),
+                    cmd.get("duration_seconds"),
+                )
+        except (TypeError, ValueError) as e:
+            log.error("Invalid profile command: %s", e)
+        return True
+    return False
+
+
+def route_measure_command(
+    payload_text: str,
+    camera_name: Optional[str],
+    measure_queues: "Dict[str, queue.Queue[dict]]",
+) -> bool:
+    """Queue a "measure now" /cmd for the camera's poller; True if handled.
+
+    Payload: ``{"action": "measure", "node": "node1", "request_id": "..."}``
+    (``camera`` may override the camera taken from the topic; a request id
+    is generated when missing).
+    """
+    import queue
+    try:
+        cmd = json.loads(payload_text)
+    except (json.JSONDecodeError, TypeError):
+        return False
+    if not isinstance(cmd, dict) or cmd.get("action") != "measure":
+        return False
+
+    camera = cmd.get("camera") or camera_name
+    target = measure_queues.get(camera) if camera else None
+    if target is None:
+        log.error("Measure command for unknown camera %s", camera)
+        return True
+    request = {
+        "request_id": str(cmd.get("request_id") or uuid.uuid4().hex),
+        "node": intern_id(cmd.get("node")),
+        "received_at": time.monotonic(),
+    }
+    try:
+        target.put_nowait(request)
+        log.info("Queued measure %s for %s/%s",
+                 request["request_id"], camera, request["node"])
+    except queue.Full:
+        log.error("Measure queue for %s is full; dropping %s",
+                  camera, request["request_id"])
+    return True
+
+
 def mqtt_subscriber_worker(
     settings: Dict[str, Any],
     stop_event: threading.Event,
     cmd_queue: "queue.Queue[str]" = None,
     camera_names: List[str] = [],
+    measure_queues: "Optional[Dict[str, queue.Queue[dict]]]" = None,
 ) -> None:
     import queue
     try:
@@ -71,6 +155,15 @@ def mqtt_subscriber_worker(
                 camera_name = name
                 break
 
+        log.debug("[MQTT] %s -> %s", topic, payload_text)
+
+        if topic.endswith("/cmd"):
+            if handle_local_command(payload_text):
+                return
+            if measure_queues and route_measure_command(
+                    payload_text, camera_name, measure_queues):
+                return
+
         if camera_name:
             if cmd_queue is not None:
                 try:
@@ -89,7 +182,6 @@ def mqtt_subscriber_worker(
                 except queue.Full:
                     log.error(
                         "Command queue is full; dropping command from %s", topic)
-        log.info("[MQTT] %s -> %s", topic, payload_text)
 
     client.on_connect = on_connect
     client.on_message = on_message
@@ -112,4 +204,8 @@ def mqtt_subscriber_worker(
             pass
 
 
-__all__ = ["mqtt_subscriber_worker"]
+__all__ = [
+    "mqtt_subscriber_worker",
+    "handle_local_command",
+    "route_measure_command",
+]
@@ -1,12 +1,14 @@
 import threading
 import queue
-from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union
+import sys
 import time
 
 from utils.http import fetch_text, HTTPError, URLError
 from utils.logging import get_logger
-from utils.types import QueueItem
+from utils.scheduler import ScheduledJob, SCHEDULE_TICK
+from utils.seq import SeqCounters
+from utils.types import Reading, intern_id
 
 
 log = get_logger("workers.http_poller")
@@ -15,82 +17,215 @@ log = get_logger("workers.http_poller")
 def poller_worker(
     name: str,
     interval_seconds: int,
-    out_queue: "queue.Queue[QueueItem]",
+    out_queue: "queue.Queue[Union[Reading, dict]]",
     stop_event: threading.Event,
     node_thermals: Optional[List[dict]] = None,
     username: Optional[str] = None,
     password: Optional[str] = None,
     timeout_seconds: Optional[float] = None,
     settle_seconds: Optional[float] = None,
+    schedule: Optional[ScheduledJob] = None,
+    measure_queue: "Optional[queue.Queue[dict]]" = None,
+    seq_counters: Optional[SeqCounters] = None,
 ) -> None:
+    # Identifiers are repeated on every reading: intern them once up front
+    camera_id = intern_id(name)
+    node_thermals = [
+        dict(
+            n,
+            name=intern_id(n.get("name")),
+            url_areaTemperature=(
+                sys.intern(n["url_areaTemperature"])
+                if n.get("url_areaTemperature") else None),
+        )
+        for n in node_thermals or []
+    ]
+
+    def read_node(node_thermal: dict) -> Optional[str]:
+        """Preset -> wait -> read temperature; None if skipped or stopped."""
+        url_presetID = node_thermal.get("url_presetID")
+        url_areaTemperature = node_thermal.get("url_areaTemperature")
+        node_thermal_name = node_thermal["name"]
+        if not url_areaTemperature:
+            log.error(
+                "[%s] Missing url_areaTemperature for a node_thermal entry", name)
+            return None
+
+        if url_presetID:
+            try:
+                _ = fetch_text(
+                    url_presetID,
+                    timeout_seconds=timeout_seconds or 5.0,
+                    username=username,
+                    password=password,
+                )
+                log.debug("[%s] Invoked preset via %s",
+                          node_thermal_name, url_presetID)
+            except HTTPError as e:
+                log.error("[%s] Preset HTTP error: %s %s",
+                          name, e.code, e.reason)
+                return None
+            except URLError as e:
+                log.error("[%s] Preset URL error: %s",
+                          name, e.reason)
+                return None
+
+            # Allow node_thermal to settle before reading temperature
+            wait_seconds = (
+                settle_seconds if settle_seconds is not None else 5.0)
+            if stop_event.wait(wait_seconds):
+                return None
+
+        data = fetch_text(
+            url_areaTemperature,
+            timeout_seconds=timeout_seconds or 5.0,
+            username=username,
+            password=password,
+        )
+        log.debug("[%s] Raw areaTemperature response: %s",
+                  node_thermal_name, data)
+        # Parse average temperature from response
+        for line in data.splitlines():
+            # neu khong co ave thi data van bang data ERROR => gay sai, Tai sao thieu data?
+            if line.startswith("aveTemperature="):
+                data = line.split("=")[1].strip()
+                break
+        return data
+
+    def emit(
+        node_thermal: dict,
+        data: str,
+        request_id: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        queue_wait_ms: Optional[float] = None,
+    ) -> None:
+        out_queue.put(
+            Reading(
+                camera_id,
+                node_thermal["name"],
+                node_thermal["url_areaTemperature"],
+                time.time_ns(),
+                data,
+                request_id,
+                latency_ms,
+                queue_wait_ms,
+                seq_counters.next(camera_id, node_thermal["name"])
+                if seq_counters is not None else None,
+            ),
+            block=False,
+        )
+
+    def serve_measure(request: dict) -> None:
+        """Read one node out of turn for a "measure now" command."""
+        node_name = request.get("node")
+        request_id = request.get("request_id")
+        if schedule is not None and not schedule.active:
+            log.debug("[%s] Standby; ignoring measure request %s",
+                      name, request_id)
+            return
+        node_thermal = next(
+            (n for n in node_thermals if n["name"] == node_name), None)
+        if node_thermal is None:
+            log.error("[%s] Measure request %s for unknown node %s",
+                      name, request_id, node_name)
+            return
+
+        started = time.monotonic()
+        try:
+            data = read_node(node_thermal)
+        except HTTPError as e:
+            log.error("[%s] Measure %s HTTP error: %s %s",
+                      name, request_id, e.code, e.reason)
+            return
+        except URLError as e:
+            log.error("[%s] Measure %s URL error: %s",
+                      name, request_id, e.reason)
+            return
+        except Exception as e:
+            log.exception("[%s] Measure %s unexpected error: %s",
+                          name, request_id, e)
+            return
+        if data is None:
+            return
+
+        received = float(request.get("received_at", started))
+        latency_ms = round((time.monotonic() - received) * 1000.0, 1)
+        queue_wait_ms = round((started - received) * 1000.0, 1)
+        try:
+            emit(node_thermal, data, request_id=request_id,
+                 latency_ms=latency_ms, queue_wait_ms=queue_wait_ms)
+        except queue.Full:
+            log.error("[%s] Output queue full; dropped measure %s reading",
+                      name, request_id)
+            return
+        log.info("[%s] Measure %s on %s: %s (latency %.0f ms, queued %.0f ms)",
+                 name, request_id, node_name, data, latency_ms, queue_wait_ms)
+
+    def serve_pending_measures() -> None:
+        if measure_queue is None:
+            return
+        while not stop_event.is_set():
+            try:
+                request = measure_queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not SCHEDULE_TICK:
+                serve_measure(request)
+
+    def wait_next_cycle() -> bool:
+        """Idle until the next patrol cycle, serving measure requests meanwhile.
+
+        With a measure queue, the scheduler posts SCHEDULE_TICK into it, so a
+        single blocking get() wakes for both; the timeout only bounds how
+        long a stop request can go unnoticed.
+        """
+        if measure_queue is None:
+            if schedule is not None:
+                return schedule.wait(stop_event)
+            return not stop_event.wait(interval_seconds)
+
+        deadline = time.monotonic() + interval_seconds
+        while not stop_event.is_set():
+            if schedule is not None:
+                if schedule.try_acquire():
+                    return True
+                timeout = 0.5
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return True
+                timeout = min(timeout, 0.5)
+            try:
+                request = measure_queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if request is not SCHEDULE_TICK:
+                serve_measure(request)
+        return False
+
+    # With a schedule, cycles start on the shared fixed-rate clock; otherwise
+    # fall back to sleeping interval_seconds after each cycle.
     while not stop_event.is_set():
+        if schedule is not None and not wait_next_cycle():
+            break
         try:
             # Two-step mode per node_thermal: preset -> wait -> read temperature
             if node_thermals:
                 for node_thermal in node_thermals:
-                    url_presetID = node_thermal.get("url_presetID")
-                    url_areaTemperature = node_thermal.get(
-                        "url_areaTemperature")
-                    node_thermal_name = node_thermal.get("name") or "unknown"
-                    if not url_areaTemperature:
-                        log.error(
-                            "[%s] Missing url_areaTemperature for a node_thermal entry", name)
-                        continue
+                    # Safe point between presets: on-demand reads go first
+                    serve_pending_measures()
+                    if stop_event.is_set():
+                        break
+                    if schedule is not None and not schedule.active:
+                        log.info("[%s] Lost leadership; stopping patrol", name)
+                        break
 
-                    if url_presetID:
-                        try:
-                            _ = fetch_text(
-                                url_presetID,
-                                timeout_seconds=timeout_seconds or 5.0,
-                                username=username,
-                                password=password,
-                            )
-                            log.info("[%s] Invoked preset via %s",
-                                     node_thermal_name, url_presetID)
-                        except HTTPError as e:
-                            log.error("[%s] Preset HTTP error: %s %s",
-                                      name, e.code, e.reason)
-                            continue
-                        except URLError as e:
-                            log.error("[%s] Preset URL error: %s",
-                                      name, e.reason)
-                            continue
-
-                        # Allow node_thermal to settle before reading temperature
-                        wait_seconds = (
-                            settle_seconds if settle_seconds is not None else 5.0)
-                        if stop_event.wait(wait_seconds):
-                            break
-
-                    data = fetch_text(
-                        url_areaTemperature,
-                        timeout_seconds=timeout_seconds or 5.0,
-                        username=username,
-                        password=password,
-                    )
-                    log.info(data)
-                    # Parse average temperature from response
-                    for line in data.splitlines():
-                        # neu khong co ave thi data van bang data ERROR => gay sai, Tai sao thieu data?
-                        if line.startswith("aveTemperature="):
-                            data = line.split("=")[1].strip()
-                            break
-
-                    timestamp = datetime.now().isoformat(timespec="seconds")
-
-                    out_queue.put(
-                        {
-                            "camera": name,
-                            "type": "temperature",
-                            "node_thermal": node_thermal_name,
-                            "url": url_areaTemperature,
-                            "timestamp": timestamp,
-                            "data_t": data,
-                        },
-                        block=False,
-                    )
+                    data = read_node(node_thermal)
+                    if data is None:
+                        continue
+                    emit(node_thermal, data)
                     log.info("[%s] Read temperature data: %s",
-                             node_thermal_name, data)
+                             node_thermal["name"], data)
             else:
                 log.error("[%s] No node_thermals configured", name)
                 break
@@ -101,7 +236,11 @@ def poller_worker(
         except Exception as e:
             log.exception("[%s] Unexpected error: %s", name, e)
 
-        if stop_event.wait(interval_seconds):
+        if schedule is not None:
+            schedule.done()
+            log.debug("[%s] Cycle took %.2fs (started %.3fs late)",
+                      name, schedule.last_duration, schedule.last_lateness)
+        elif not wait_next_cycle():
             break
 
 
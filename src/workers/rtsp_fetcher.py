@@ -20,6 +20,7 @@ def rtsp_fetcher_worker(
     password: Optional[str] = None,
     camera_name: Optional[str] = None,
     poll_interval_seconds: float = 0.5,
+    active: Optional[threading.Event] = None,
 ) -> None:
     def fetch_and_emit() -> None:
         try:
@@ -67,6 +68,9 @@ def rtsp_fetcher_worker(
         try:
             cmd_data = json.loads(cmd)
             if cmd_data.get("type") == "get_url_rtsp":
+                if active is not None and not active.is_set():
+                    log.debug("Standby; leaving RTSP request to the leader")
+                    continue
                 fetch_and_emit()
             else:
                 log.debug("Ignored command: %s", cmd)